@@ -14,26 +14,185 @@ This script:
   - copies repo assets/ (images/fonts/json/css)
   - rewrites root-absolute links (/assets, /static, /overview, ...) to include a base path
     suitable for GitHub project pages (e.g. "/<repo-name>")
+
+Requests go over reused keep-alive connections, except where HTTP(S)_PROXY/NO_PROXY
+say a proxy applies; those fall back to urllib.request.urlopen, which handles proxies.
 """
 
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
+import contextlib
+import functools
+import gzip
+import http.client
 import os
-import posixpath
 import re
 import shutil
 import sys
+import threading
 import time
+import urllib.error
 import urllib.parse
 import urllib.request
 from pathlib import Path
+from typing import Callable, Iterator
+
+# Glance is I/O bound from our side; this many requests are kept in flight at once.
+_FETCH_WORKERS = 16
+
+_USER_AGENT = "iqss-glance-static-export/1.0"
+# Ask for compressed bodies (HTML/CSS shrink several-fold); they're decompressed on
+# receipt, so files on disk stay uncompressed.
+_REQUEST_HEADERS = {"User-Agent": _USER_AGENT, "Accept-Encoding": "gzip"}
+_MAX_REDIRECTS = 5
+
+# Patterns are compiled once here rather than looked up in re's cache on every call.
+# `slug: <value>` lines in config/*.yml, matched across a whole file at once. Only
+# [ \t] around the value so a match can't run onto a neighbouring line.
+_SLUG_RE = re.compile(r"^[ \t]*slug:[ \t]*([A-Za-z0-9_-]+)[ \t\r]*$", re.MULTILINE)
+# Example: <link rel="stylesheet" href='/static/<hash>/css/bundle.css'>
+_BUNDLE_CSS_RE = re.compile(
+    r"<link[^>]+href=['\"](/static/[^'\"]+/css/bundle\.css)['\"][^>]*>",
+    re.IGNORECASE,
+)
+_PAGE_JS_RE = re.compile(
+    r"<script[^>]+src=['\"](/static/[^'\"]+/js/page\.js)['\"][^>]*></script>",
+    re.IGNORECASE,
+)
+_PAGE_CONTENT_RE = re.compile(
+    r'(<div[^>]*\bid=["\']page-content["\'][^>]*>)\s*</div>',
+    re.IGNORECASE | re.DOTALL,
+)
+_MAIN_CLASS_RE = re.compile(r'(<main[^>]*\bclass=["\'])page(\b[^"\']*["\'][^>]*>)', re.IGNORECASE)
+_ARIA_BUSY_RE = re.compile(r'(\baria-busy=["\'])true(["\'])', re.IGNORECASE)
+_SPA_SCRIPT_RE = re.compile(
+    r"<script[^>]+src=['\"]/static/[^'\"]+/js/page\.js['\"][^>]*></script>\s*",
+    re.IGNORECASE,
+)
+# Handles url(foo), url('foo'), url("foo"). Bytes pattern: it scans the raw bundle.css.
+_CSS_URL_RE = re.compile(rb"url\(\s*(['\"]?)([^'\"\)]+)\1\s*\)")
+# Everything _make_rewriter's rewrite touches, in one pass:
+#   1) href/src/action="/..." and CSS url(/...) root-absolute URLs; (?!/) skips
+#      protocol-relative "//host".
+#   2) Glance's relative manifest href (href="manifest.json").
+# Bytes pattern: every token is ASCII, so files are rewritten without a decode/encode.
+_REWRITE_RE = re.compile(
+    rb"""((?:href|src|action)=["']|url\(\s*["']?)/(?!/)"""
+    rb"""|(?i:(href=["'])(?=manifest\.json))"""
+)
+
+# Below this many files the rewrite pass runs serially: a typical export is ~a dozen
+# files, and process-pool startup (a full re-import where workers are spawned) costs
+# far more than rewriting them.
+_REWRITE_POOL_MIN_FILES = 256
+
+# Exported files the base-path rewrite applies to. Matched case-sensitively: the
+# exporter writes these names itself and repo assets use lowercase extensions.
+_REWRITE_SUFFIXES = (".html", ".css")
+
+# One keep-alive connection per (thread, scheme, host), so the ~2N+M requests of a run
+# don't each pay for a fresh TCP (and TLS) handshake.
+_local = threading.local()
+
+
+def _connection(scheme: str, netloc: str) -> http.client.HTTPConnection:
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get((scheme, netloc))
+    if conn is None:
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = conns[(scheme, netloc)] = cls(netloc)
+    return conn
+
+
+def _drop_connection(scheme: str, netloc: str) -> None:
+    conn = getattr(_local, "conns", {}).pop((scheme, netloc), None)
+    if conn is not None:
+        conn.close()
+
+
+def _get(scheme: str, netloc: str, path: str, timeout_s: float) -> http.client.HTTPResponse:
+    conn = _connection(scheme, netloc)
+    reused = conn.sock is not None
+    conn.timeout = timeout_s
+    if reused:
+        conn.sock.settimeout(timeout_s)
+    try:
+        conn.request("GET", path, headers=_REQUEST_HEADERS)
+        return conn.getresponse()
+    except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+        _drop_connection(scheme, netloc)
+        if not reused:
+            raise
+    # The server closed the idle keep-alive connection; retry once on a fresh one.
+    conn = _connection(scheme, netloc)
+    conn.timeout = timeout_s
+    conn.request("GET", path, headers=_REQUEST_HEADERS)
+    return conn.getresponse()
+
+
+@functools.lru_cache(maxsize=None)
+def _proxied(scheme: str, netloc: str) -> bool:
+    # Same decision urlopen makes from the environment (or system settings).
+    if scheme not in urllib.request.getproxies():
+        return False
+    return not urllib.request.proxy_bypass(netloc)
+
+
+@contextlib.contextmanager
+def _open(url: str, timeout_s: float = 20.0) -> Iterator[http.client.HTTPResponse]:
+    """
+    GET url, following redirects, and yield the successful response.
+    Read the body to the end inside the with-block so the connection can be reused.
+    Hosts behind a configured proxy go through urlopen instead of a direct connection.
+    """
+    for _ in range(_MAX_REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        if _proxied(parts.scheme, parts.netloc):
+            req = urllib.request.Request(url, headers=_REQUEST_HEADERS)
+            with urllib.request.urlopen(req, timeout=timeout_s) as resp:
+                yield resp
+            return
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        try:
+            resp = _get(parts.scheme, parts.netloc, path, timeout_s)
+            if 200 <= resp.status < 300:
+                yield resp
+                if not resp.isclosed():
+                    # Unread body left on the socket; don't reuse it.
+                    _drop_connection(parts.scheme, parts.netloc)
+                return
+            resp.read()
+        except Exception:
+            _drop_connection(parts.scheme, parts.netloc)
+            raise
+        location = resp.getheader("Location")
+        if resp.status in (301, 302, 303, 307, 308) and location:
+            url = urllib.parse.urljoin(url, location)
+            continue
+        raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+    raise RuntimeError(f"Too many redirects fetching {url}")
+
+
+def _is_gzip(resp: http.client.HTTPResponse) -> bool:
+    return (resp.getheader("Content-Encoding") or "").strip().lower() == "gzip"
 
 
 def _fetch_bytes(url: str, timeout_s: float = 20.0) -> bytes:
-    req = urllib.request.Request(url, headers={"User-Agent": "iqss-glance-static-export/1.0"})
-    with urllib.request.urlopen(req, timeout=timeout_s) as resp:
-        return resp.read()
+    with _open(url, timeout_s=timeout_s) as resp:
+        data = resp.read()
+        return gzip.decompress(data) if _is_gzip(resp) else data
+
+
+def _fetch_to_file(url: str, path: Path, timeout_s: float = 20.0) -> None:
+    # Stream the body straight to disk rather than holding it in memory.
+    _mkdirp(path.parent)
+    with _open(url, timeout_s=timeout_s) as resp, open(path, "wb") as f:
+        src = gzip.GzipFile(fileobj=resp) if _is_gzip(resp) else resp
+        shutil.copyfileobj(src, f, 1 << 16)
 
 
 def _fetch_text(url: str, timeout_s: float = 20.0) -> str:
@@ -54,6 +213,22 @@ def _write_text(path: Path, data: str) -> None:
     path.write_text(data, encoding="utf-8")
 
 
+def _link_or_copy(src: str, dst: str) -> str:
+    """
+    copytree copy_function: hardlink where possible instead of copying bytes.
+    HTML/CSS are always real copies because the base-path rewrite edits them in place,
+    which would otherwise write through the link into the repo's own files.
+    """
+    if not src.endswith(_REWRITE_SUFFIXES):
+        try:
+            os.link(src, dst)
+            return dst
+        except OSError:
+            # Cross-device, unsupported filesystem, permissions, ...
+            pass
+    return shutil.copy2(src, dst)
+
+
 def _normalize_base_path(base_path: str) -> str:
     """
     "" (empty) means no rewrite (useful for local preview at /).
@@ -69,16 +244,12 @@ def _normalize_base_path(base_path: str) -> str:
 
 def _discover_slugs(config_dir: Path) -> list[str]:
     # Keep this YAML-free: we just regex for `slug: <value>` in config/*.yml.
-    slug_re = re.compile(r"^\s*slug:\s*([A-Za-z0-9_-]+)\s*$")
     slugs: list[str] = []
     seen: set[str] = set()
 
     for yml in sorted(config_dir.glob("*.yml")):
         try:
-            for line in yml.read_text(encoding="utf-8", errors="replace").splitlines():
-                m = slug_re.match(line)
-                if not m:
-                    continue
+            for m in _SLUG_RE.finditer(yml.read_text(encoding="utf-8", errors="replace")):
                 slug = m.group(1)
                 if slug in seen:
                     continue
@@ -94,122 +265,137 @@ def _discover_slugs(config_dir: Path) -> list[str]:
 
 
 def _extract_bundle_css_path(shell_html: str) -> str:
-    # Example: <link rel="stylesheet" href='/static/<hash>/css/bundle.css'>
-    m = re.search(
-        r"<link[^>]+href=['\"](/static/[^'\"]+/css/bundle\.css)['\"][^>]*>",
-        shell_html,
-        flags=re.IGNORECASE,
-    )
+    m = _BUNDLE_CSS_RE.search(shell_html)
     if not m:
         raise RuntimeError("Could not find bundle.css path in page HTML")
     return m.group(1)
 
 
 def _extract_page_js_path(shell_html: str) -> str | None:
-    m = re.search(
-        r"<script[^>]+src=['\"](/static/[^'\"]+/js/page\.js)['\"][^>]*></script>",
-        shell_html,
-        flags=re.IGNORECASE,
-    )
+    m = _PAGE_JS_RE.search(shell_html)
     return m.group(1) if m else None
 
 
-def _inject_content(shell_html: str, content_html: str) -> str:
-    # 1) Inject content into the placeholder.
+def _split_shell(shell_html: str) -> tuple[str, str]:
+    """
+    Prepare a shell page for static export and split it around the page-content
+    placeholder, so the exported page is head + content_html + tail.
+    """
+    # Glance renders the markup below verbatim, so plain string searches find it; the
+    # regexes are only a fallback for markup quoted or cased differently.
+
+    # 1) Mark as content-ready so Glance CSS shows content and hides loader.
+    # <main class="page" ... aria-busy="true">
+    # -> <main class="page content-ready" ... aria-busy="false">
+    i = shell_html.find('<main class="page')
+    j = i + len('<main class="page')
+    if i >= 0 and shell_html[j : j + 1] in ('"', " "):
+        shell_html = shell_html[:j] + " content-ready" + shell_html[j:]
+    else:
+        shell_html = _MAIN_CLASS_RE.sub(r"\1page content-ready\2", shell_html, count=1)
+    if 'aria-busy="true"' in shell_html:
+        shell_html = shell_html.replace('aria-busy="true"', 'aria-busy="false"', 1)
+    else:
+        shell_html = _ARIA_BUSY_RE.sub(r"\1false\2", shell_html, count=1)
+
+    # 2) Remove the SPA JS boot file so it doesn't try to re-fetch /api at runtime.
+    # This one stays a regex: the path embeds a per-build hash.
+    shell_html = _SPA_SCRIPT_RE.sub("", shell_html, count=1)
+
+    # 3) Split at the placeholder content gets injected into.
     # The shell contains:
     #   <div class="page-content" id="page-content"></div>
-    injected, n = re.subn(
-        r'(<div[^>]*\bid=["\']page-content["\'][^>]*>)\s*</div>',
-        r"\1" + content_html + r"</div>",
-        shell_html,
-        count=1,
-        flags=re.IGNORECASE | re.DOTALL,
-    )
-    if n != 1:
+    i = shell_html.find('id="page-content"')
+    if i >= 0:
+        open_end = shell_html.find(">", i) + 1
+        close = shell_html.find("</div>", open_end)
+        if open_end and close >= 0 and not shell_html[open_end:close].strip():
+            return shell_html[:open_end], shell_html[close:]
+    m = _PAGE_CONTENT_RE.search(shell_html)
+    if not m:
         raise RuntimeError("Failed to inject page content (page-content div not found)")
+    return shell_html[: m.end(1)], "</div>" + shell_html[m.end() :]
 
-    # 2) Mark as content-ready so Glance CSS shows content and hides loader.
-    # <main class="page" ... aria-busy="true">
-    # -> <main class="page content-ready" ... aria-busy="false">
-    injected = re.sub(
-        r'(<main[^>]*\bclass=["\'])page(\b[^"\']*["\'][^>]*>)',
-        r"\1page content-ready\2",
-        injected,
-        count=1,
-        flags=re.IGNORECASE,
-    )
-    injected = re.sub(
-        r'(\baria-busy=["\'])true(["\'])',
-        r"\1false\2",
-        injected,
-        count=1,
-        flags=re.IGNORECASE,
-    )
-
-    # 3) Remove the SPA JS boot file so it doesn't try to re-fetch /api at runtime.
-    injected = re.sub(
-        r"<script[^>]+src=['\"]/static/[^'\"]+/js/page\.js['\"][^>]*></script>\s*",
-        "",
-        injected,
-        count=1,
-        flags=re.IGNORECASE,
-    )
-    return injected
-
-
-def _rewrite_base_paths(text: str, base_path: str) -> str:
+
+@functools.lru_cache(maxsize=None)
+def _make_rewriter(base_path: str) -> Callable[[bytes], bytes]:
     """
-    Prefix root-absolute paths with base_path:
+    Return a function that prefixes root-absolute paths with base_path:
       href="/assets/.." -> href="/<base>/assets/.."
     Avoid protocol-relative URLs like href="//example.com".
+    Cached, so each process builds it once per base path rather than once per file.
     """
     if not base_path:
-        return text
-
-    # Common HTML attributes with root-absolute URLs.
-    for attr in ("href", "src", "action"):
-        text = re.sub(
-            rf'{attr}="/(?!/)',
-            f'{attr}="{base_path}/',
-            text,
-        )
-        text = re.sub(
-            rf"{attr}='/(?!/)",
-            f"{attr}='{base_path}/",
-            text,
-        )
-
-    # CSS url() root-absolute URLs.
-    text = re.sub(r"url\('/(?!/)", f"url('{base_path}/", text)
-    text = re.sub(r'url\("/(?!/)', f'url("{base_path}/', text)
-
-    # Glance uses a relative manifest href (manifest.json) which breaks on /<slug>/ pages.
-    # Make it base-absolute.
-    text = re.sub(
-        r"""href=(['"])manifest\.json""",
-        rf"href=\1{base_path}/manifest.json",
-        text,
-        flags=re.IGNORECASE,
-    )
-    return text
-
-
-def _download_static_css_and_deps(glance_url: str, out_dir: Path, bundle_css_path: str) -> None:
-    css_url = urllib.parse.urljoin(glance_url.rstrip("/") + "/", bundle_css_path.lstrip("/"))
+        return lambda data: data
+
+    # Both branches keep the matched prefix and insert the base path after it. Glance
+    # uses a relative manifest href which breaks on /<slug>/ pages, so that one becomes
+    # base-absolute too.
+    prefix = (base_path + "/").encode("utf-8")
+    sub = _REWRITE_RE.sub
+
+    def repl(m: re.Match[bytes]) -> bytes:
+        return (m.group(1) or m.group(2)) + prefix
+
+    def rewrite(data: bytes) -> bytes:
+        return sub(repl, data)
+
+    return rewrite
+
+
+def _walk_files(root: str) -> Iterator[str]:
+    """
+    Yield paths of .html/.css files under root.
+    os.scandir's DirEntry knows its type from readdir, so this needs no per-file stat.
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(_REWRITE_SUFFIXES) and entry.is_file():
+                    yield entry.path
+
+
+def _rewrite_file(path: str, base_path: str) -> None:
+    # Top-level so it can run in a ProcessPoolExecutor worker.
+    try:
+        with open(path, "rb") as f:
+            original = f.read()
+    except Exception:
+        return
+    rewritten = _make_rewriter(base_path)(original)
+    # re.sub hands back the input object itself when nothing matched, so an identity
+    # check avoids comparing two full copies of the file.
+    if rewritten is not original:
+        with open(path, "wb") as f:
+            f.write(rewritten)
+
+
+def _download_static_css_and_deps(
+    glance_url: str,
+    out_dir: Path,
+    bundle_css_path: str,
+    pool: concurrent.futures.Executor,
+) -> None:
+    # bundle_css_path and every ref below are root-absolute, so plain concatenation
+    # builds the same URL urljoin would without re-parsing both sides each time.
+    base_url = glance_url.rstrip("/")
+    css_url = base_url + "/" + bundle_css_path.lstrip("/")
     css_bytes = _fetch_bytes(css_url)
     css_out = out_dir / bundle_css_path.lstrip("/")
     _write_bytes(css_out, css_bytes)
 
-    css_text = css_bytes.decode("utf-8", errors="replace")
-    css_dir = "/" + str(Path(bundle_css_path).parent).lstrip("/")
+    # Relative refs are resolved against these segments of the CSS directory.
+    css_dir_parts = [p for p in bundle_css_path.split("/")[:-1] if p]
 
     # Extract url(...) references. This intentionally ignores @import (not expected here).
-    # Handles url(foo), url('foo'), url("foo").
-    url_re = re.compile(r"url\(\s*(['\"]?)([^'\"\)]+)\1\s*\)")
     refs: set[str] = set()
 
-    for m in url_re.finditer(css_text):
-        ref = m.group(2).strip()
+    # Scan the bytes directly; only the (short) matched URLs get decoded.
+    for m in _CSS_URL_RE.finditer(css_bytes):
+        ref = m.group(2).decode("utf-8", errors="replace").strip()
         if not ref or ref.startswith("data:"):
             continue
         if ref.startswith("http://") or ref.startswith("https://"):
@@ -219,19 +405,27 @@ def _download_static_css_and_deps(glance_url: str, out_dir: Path, bundle_css_pat
             refs.add(ref)
             continue
 
-        # Resolve relative to the CSS directory.
-        resolved = posixpath.normpath(posixpath.join(css_dir, ref))
-        if not resolved.startswith("/"):
-            resolved = "/" + resolved
-        refs.add(resolved)
-
-    for ref in sorted(refs):
-        ref_url = urllib.parse.urljoin(glance_url.rstrip("/") + "/", ref.lstrip("/"))
+        # Resolve relative to the CSS directory (what posixpath.normpath(join(...))
+        # would give, without building the intermediate strings).
+        parts = css_dir_parts.copy()
+        for seg in ref.split("/"):
+            if seg == "..":
+                if parts:
+                    parts.pop()
+            elif seg and seg != ".":
+                parts.append(seg)
+        refs.add("/" + "/".join(parts))
+
+    def download(ref: str) -> None:
+        ref_url = base_url + ref
         try:
-            data = _fetch_bytes(ref_url)
+            _fetch_to_file(ref_url, out_dir / ref.lstrip("/"))
         except Exception as e:
             raise RuntimeError(f"Failed to download static dependency {ref} from {ref_url}: {e}") from e
-        _write_bytes(out_dir / ref.lstrip("/"), data)
+
+    # Drain the iterator so the first failure is raised here.
+    for _ in pool.map(download, sorted(refs)):
+        pass
 
 
 def main() -> int:
@@ -256,6 +450,8 @@ def main() -> int:
     # Wait for Glance to be up (use /home if present, else /).
     start = time.time()
     probe_path = "/home" if "home" in slugs else "/"
+    # Back off from 50ms up to 500ms so a fast-booting Glance isn't left waiting.
+    delay = 0.05
     while True:
         try:
             _fetch_bytes(glance_url + probe_path, timeout_s=5.0)
@@ -264,7 +460,8 @@ def main() -> int:
             if time.time() - start > args.timeout_seconds:
                 print(f"ERROR: Glance did not become ready at {glance_url} within timeout", file=sys.stderr)
                 return 3
-            time.sleep(0.5)
+            time.sleep(delay)
+            delay = min(delay * 1.5, 0.5)
 
     if out_dir.exists():
         shutil.rmtree(out_dir)
@@ -275,7 +472,7 @@ def main() -> int:
     if not repo_assets.is_dir():
         print("ERROR: assets/ directory not found in repo root", file=sys.stderr)
         return 4
-    shutil.copytree(repo_assets, out_dir / "assets")
+    shutil.copytree(repo_assets, out_dir / "assets", copy_function=_link_or_copy)
 
     # Fetch manifest.json (used by Glance shell).
     try:
@@ -285,34 +482,43 @@ def main() -> int:
         # Not fatal for static rendering.
         pass
 
-    # Use one shell page to find Glance's static bundle CSS path.
-    sample_shell = _fetch_text(glance_url + ("/home" if "home" in slugs else f"/{slugs[0]}"))
-    bundle_css_path = _extract_bundle_css_path(sample_shell)
-    _download_static_css_and_deps(glance_url, out_dir, bundle_css_path)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_FETCH_WORKERS) as pool:
+        # Queue every page fetch up front; they run while the static assets download.
+        shells = {slug: pool.submit(_fetch_bytes, glance_url + f"/{slug}") for slug in slugs}
+        contents = {slug: pool.submit(_fetch_text, glance_url + f"/api/pages/{slug}/content/") for slug in slugs}
+
+        # Use one shell page to find Glance's static bundle CSS path. It comes from the
+        # page fetches above rather than a separate request.
+        sample_shell = shells["home" if "home" in slugs else slugs[0]].result()
+        bundle_css_path = _extract_bundle_css_path(sample_shell.decode("utf-8", errors="replace"))
+        _download_static_css_and_deps(glance_url, out_dir, bundle_css_path, pool)
+
+        # Build each page.
+        writes: list[concurrent.futures.Future[None]] = []
+        for slug in slugs:
+            head, tail = _split_shell(shells[slug].result().decode("utf-8", errors="replace"))
+            page_html = head + contents[slug].result() + tail
+            # Write on the pool so disk I/O overlaps with waiting on the next page.
+            writes.append(pool.submit(_write_text, out_dir / slug / "index.html", page_html))
 
-    # Build each page.
-    for slug in slugs:
-        shell_html = _fetch_text(glance_url + f"/{slug}")
-        content_html = _fetch_text(glance_url + f"/api/pages/{slug}/content/")
-        page_html = _inject_content(shell_html, content_html)
-        _write_text(out_dir / slug / "index.html", page_html)
+            if slug == "home":
+                writes.append(pool.submit(_write_text, out_dir / "index.html", page_html))
 
-        if slug == "home":
-            _write_text(out_dir / "index.html", page_html)
+        for w in writes:
+            w.result()
 
     # Rewrite base paths in exported HTML/CSS (notably assets/user.css contains /assets/... URLs).
-    for p in out_dir.rglob("*"):
-        if not p.is_file():
-            continue
-        if p.suffix.lower() not in (".html", ".css"):
-            continue
-        try:
-            original = p.read_text(encoding="utf-8", errors="replace")
-        except Exception:
-            continue
-        rewritten = _rewrite_base_paths(original, base_path)
-        if rewritten != original:
-            p.write_text(rewritten, encoding="utf-8")
+    # With no base path there is nothing to rewrite, so don't read the files at all.
+    if base_path:
+        paths = list(_walk_files(str(out_dir)))
+        if len(paths) < _REWRITE_POOL_MIN_FILES:
+            for path in paths:
+                _rewrite_file(path, base_path)
+        else:
+            # Files are independent, so spread the read/regex/write work across cores.
+            with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+                for _ in pool.map(_rewrite_file, paths, [base_path] * len(paths), chunksize=8):
+                    pass
 
     # GitHub Pages: ensure Jekyll is disabled.
     _write_text(out_dir / ".nojekyll", "")